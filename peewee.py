@@ -4793,14 +4793,15 @@ class UUIDField(Field):
     field_type = 'UUID'
 
     def db_value(self, value):
-        if isinstance(value, basestring) and len(value) == 32:
+        if isinstance(value, uuid.UUID):
+            # Most common case, the value is already a UUID instance.
+            return value.hex
+        elif isinstance(value, basestring) and len(value) == 32:
             # Hex string. No transformation is necessary.
             return value
         elif isinstance(value, bytes) and len(value) == 16:
             # Allow raw binary representation.
-            value = uuid.UUID(bytes=value)
-        if isinstance(value, uuid.UUID):
-            return value.hex
+            return uuid.UUID(bytes=value).hex
         try:
             return uuid.UUID(value).hex
         except:
@@ -9,6 +9,9 @@ from peewee import ColumnMetadata  # (name, data_type, null, primary_key, table,
 from peewee import ForeignKeyMetadata  # (column, dest_table, dest_column, table).
 from peewee import IndexMetadata
 from playhouse.pool import _PooledPostgresqlDatabase
+from playhouse.postgres_ext import ServerSide
+from playhouse.postgres_ext import _ServerSideCursorMixin
+from playhouse.postgres_ext import __named_cursor__
 try:
     from playhouse.postgres_ext import ArrayField
     from playhouse.postgres_ext import BinaryJSONField
@@ -48,7 +51,7 @@ class RowIDField(AutoField):
         super(RowIDField, self).__init__(*args, **kwargs)
 
 
-class CockroachDatabase(PostgresqlDatabase):
+class CockroachDatabase(_ServerSideCursorMixin, PostgresqlDatabase):
     field_types = PostgresqlDatabase.field_types.copy()
     field_types.update({
         'BLOB': 'BYTES',
@@ -74,6 +77,15 @@ class CockroachDatabase(PostgresqlDatabase):
             # Fallback to use whatever cockroachdb tells us via protocol.
             super(CockroachDatabase, self)._set_server_version(conn)
 
+    def cursor(self, commit=None):
+        cursor = super(CockroachDatabase, self).cursor(commit)
+        # Server-side cursors (DECLARE / FETCH) require CRDB 22.1 or newer.
+        if commit is __named_cursor__ and self.server_version < 220100:
+            cursor.close()
+            raise NotImplementedError('Server-side cursors require '
+                                      'CockroachDB 22.1 or newer.')
+        return cursor
+
     def _get_pk_constraint(self, table, schema=None):
         query = ('SELECT constraint_name '
                  'FROM information_schema.table_constraints '
@@ -182,6 +194,11 @@ def run_transaction(db, callback, max_attempts=None, system_time=None,
 
     Additionally, the database must not have any open transaction at the time
     this function is called, as CRDB does not support nested transactions.
+
+    Retries use CRDB's client-side retry protocol: the callback runs after a
+    ``SAVEPOINT cockroach_restart``, and on a retryable (40001) error we roll
+    back to that savepoint and call it again. The outer transaction and the
+    connection are kept for every attempt.
     """
     max_attempts = max_attempts or -1
     with db.atomic(system_time=system_time, priority=priority) as txn:
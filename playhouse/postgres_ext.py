@@ -450,17 +450,10 @@ class _empty_object(object):
 __named_cursor__ = _empty_object()
 
 
-class PostgresqlExtDatabase(PostgresqlDatabase):
-    def __init__(self, *args, **kwargs):
-        self._register_hstore = kwargs.pop('register_hstore', False)
-        self._server_side_cursors = kwargs.pop('server_side_cursors', False)
-        super(PostgresqlExtDatabase, self).__init__(*args, **kwargs)
-
-    def _connect(self):
-        conn = super(PostgresqlExtDatabase, self)._connect()
-        if self._register_hstore:
-            register_hstore(conn, globally=True)
-        return conn
+class _ServerSideCursorMixin(object):
+    # Implements named (server-side) cursor support for psycopg2-based
+    # databases, which is used by the ServerSide() helper.
+    _server_side_cursors = False
 
     def cursor(self, commit=None):
         if self.is_closed():
@@ -484,3 +477,16 @@ class PostgresqlExtDatabase(PostgresqlDatabase):
         if named_cursor:
             cursor = FetchManyCursor(cursor, array_size)
         return cursor
+
+
+class PostgresqlExtDatabase(_ServerSideCursorMixin, PostgresqlDatabase):
+    def __init__(self, *args, **kwargs):
+        self._register_hstore = kwargs.pop('register_hstore', False)
+        self._server_side_cursors = kwargs.pop('server_side_cursors', False)
+        super(PostgresqlExtDatabase, self).__init__(*args, **kwargs)
+
+    def _connect(self):
+        conn = super(PostgresqlExtDatabase, self)._connect()
+        if self._register_hstore:
+            register_hstore(conn, globally=True)
+        return conn
@@ -108,6 +108,12 @@ if IS_MYSQL:
     db.close()
     if not IS_MYSQL_ADVANCED_FEATURES:
         logger.warning('MySQL too old to test certain advanced features.')
+IS_CRDB_NAMED_CURSORS = False
+if IS_CRDB:
+    db.connect()
+    # CRDB added support for DECLARE / FETCH (server-side cursors) in 22.1.
+    IS_CRDB_NAMED_CURSORS = db.server_version >= 220100
+    db.close()
 
 
 class TestModel(Model):
@@ -1,10 +1,12 @@
 import datetime
 import uuid
+from operator import itemgetter
 
 from peewee import *
 from playhouse.cockroachdb import *
 
 from .base import IS_CRDB
+from .base import IS_CRDB_NAMED_CURSORS
 from .base import ModelTestCase
 from .base import TestModel
 from .base import db
@@ -141,10 +143,13 @@ class TestCockroachDatabase(ModelTestCase):
     @requires_models(KV)
     def test_run_transaction_helper(self):
         def succeeds(db):
-            KV.insert_many([('k%s' % i, i) for i in range(10)]).execute()
+            # The callback may be re-run, so build the row generator here.
+            rows = (('k%s' % i, i) for i in range(10))
+            for chunk in chunked(rows, 4):
+                KV.insert_many(chunk).execute()
         run_transaction(self.database, succeeds)
-        self.assertEqual([(kv.k, kv.v) for kv in KV.select().order_by(KV.k)],
-                         [('k%s' % i, i) for i in range(10)])
+        query = KV.select(KV.k, KV.v).order_by(KV.k).tuples()
+        self.assertEqual(list(query), [('k%s' % i, i) for i in range(10)])
 
     @requires_models(KV)
     def test_cannot_nest_run_transaction(self):
@@ -181,10 +186,25 @@ class TestCockroachDatabase(ModelTestCase):
 
         self.assertEqual(retry_decorator(), ['k0', 'k1', 'k2', 'k3', 'k4'])
 
+    @skip_unless(IS_CRDB_NAMED_CURSORS, 'requires CockroachDB 22.1 or newer')
+    @requires_models(KV)
+    def test_server_side_cursor(self):
+        KV.insert_many([('k%02d' % i, i) for i in range(25)]).execute()
+
+        query = KV.select(KV.k, KV.v).order_by(KV.k).tuples()
+        with self.assertQueryCount(1):
+            data = list(ServerSide(query, array_size=10))
+            self.assertEqual(data, [('k%02d' % i, i) for i in range(25)])
+
+        ss_query = ServerSide(query.where(KV.v < 0))
+        self.assertEqual(list(ss_query), [])
+
     @requires_models(Arr)
     def test_array_field(self):
-        a1 = Arr.create(title='a1', tags=['t1', 't2'])
-        a2 = Arr.create(title='a2', tags=['t2', 't3'])
+        id_list = Arr.insert_many([
+            {Arr.title: 'a1', Arr.tags: ['t1', 't2']},
+            {Arr.title: 'a2', Arr.tags: ['t2', 't3']}]).execute()
+        a1_id, a2_id = map(itemgetter(0), id_list)
 
         # Ensure we can read an array back.
         a1_db = Arr.get(Arr.title == 'a1')
@@ -192,11 +212,11 @@ class TestCockroachDatabase(ModelTestCase):
 
         # Ensure we can filter on arrays.
         a2_db = Arr.get(Arr.tags == ['t2', 't3'])
-        self.assertEqual(a2_db.id, a2.id)
+        self.assertEqual(a2_db.id, a2_id)
 
         # Item lookups.
         a1_db = Arr.get(Arr.tags[1] == 't2')
-        self.assertEqual(a1_db.id, a1.id)
+        self.assertEqual(a1_db.id, a1_id)
         self.assertRaises(Arr.DoesNotExist, Arr.get, Arr.tags[2] == 'x')
 
     @requires_models(Arr)
@@ -210,7 +230,7 @@ class TestCockroachDatabase(ModelTestCase):
             ('a2', ['t2', 't3']),
             ('a3', ['t3', 't4']))
         id_list = Arr.insert_many(data).execute()
-        a1, a2, a3 = [pk for pk, in id_list]
+        a1, a2, a3 = map(itemgetter(0), id_list)
 
         assertAM(Value('t2') == fn.ANY(Arr.tags), [a1, a2])
         assertAM(Value('t1') == fn.Any(Arr.tags), [a1])
@@ -227,15 +247,30 @@ class TestCockroachDatabase(ModelTestCase):
         assertAM(Arr.tags.contains('t2', 't3', 't4'), [])
 
         assertAM(Arr.tags.contains_any('t2'), [a1, a2])
-        assertAM(Arr.tags.contains_any('t3'), [a2, a3])
-        assertAM(Arr.tags.contains_any('t1', 't2'), [a1, a2])
-        assertAM(Arr.tags.contains_any('t3', 't4'), [a2, a3])
         assertAM(Arr.tags.contains_any('t2', 't3', 't4'), [a1, a2, a3])
 
+        # Evaluate all of the contains_any() needles in a single query, with
+        # one boolean column per needle.
+        needles = (
+            (('t2',), [a1, a2]),
+            (('t3',), [a2, a3]),
+            (('t1', 't2'), [a1, a2]),
+            (('t3', 't4'), [a2, a3]),
+            (('t2', 't3', 't4'), [a1, a2, a3]))
+        query = (Arr
+                 .select(Arr.id, *[Arr.tags.contains_any(*items)
+                                   for items, _ in needles])
+                 .order_by(Arr.title)
+                 .tuples())
+        rows = list(query)
+        for i, (items, id_list) in enumerate(needles, 1):
+            self.assertEqual([row[0] for row in rows if row[i]], id_list)
+
     @requires_models(Arr)
     def test_array_field_index(self):
-        a1 = Arr.create(title='a1', tags=['a1', 'a2'])
-        a2 = Arr.create(title='a2', tags=['a2', 'a3', 'a4', 'a5'])
+        Arr.insert_many([
+            {Arr.title: 'a1', Arr.tags: ['a1', 'a2']},
+            {Arr.title: 'a2', Arr.tags: ['a2', 'a3', 'a4', 'a5']}]).execute()
 
         # NOTE: CRDB does not support array slicing.
         query = (Arr
@@ -253,7 +288,7 @@ class TestCockroachDatabase(ModelTestCase):
 
         # Bulk-insert works as expected.
         id_list = UID.insert_many([('u2',), ('u3',)]).execute()
-        u2_id, u3_id = [pk for pk, in id_list]
+        u2_id, u3_id = map(itemgetter(0), id_list)
         self.assertTrue(isinstance(u2_id, uuid.UUID))
 
         # We can perform lookups using UUID() type.
@@ -271,7 +306,7 @@ class TestCockroachDatabase(ModelTestCase):
 
         # Bulk-insert works as expected.
         id_list = RID.insert_many([('r2',), ('r3',)]).execute()
-        r2_id, r3_id = [pk for pk, in id_list]
+        r2_id, r3_id = map(itemgetter(0), id_list)
 
         r2 = RID.get(RID.id == r2_id)
         self.assertEqual(r2.title, 'r2')
@@ -313,25 +348,40 @@ class TestCockroachDatabase(ModelTestCase):
     @requires_models(UID, UIDNote)
     def test_uuid_key_as_fk(self):
         # This is covered thoroughly elsewhere, but added here just for fun.
-        u1, u2, u3 = [UID.create(title='u%s' % i) for i in (1, 2, 3)]
-        UIDNote.create(uid=u1, note='u1-1')
-        UIDNote.create(uid=u2, note='u2-1')
-        UIDNote.create(uid=u2, note='u2-2')
+        query = (UID
+                 .insert_many([{UID.title: 'u%s' % i} for i in (1, 2, 3)])
+                 .returning(UID))
+        u1, u2, u3 = query.execute()
+        UIDNote.insert_many([
+            {UIDNote.uid: u1, UIDNote.note: 'u1-1'},
+            {UIDNote.uid: u2, UIDNote.note: 'u2-1'},
+            {UIDNote.uid: u2, UIDNote.note: 'u2-2'}]).execute()
 
         with self.assertQueryCount(1):
+            # Project the joined column directly onto the note, rather than
+            # reconstructing a UID instance for every row.
             query = (UIDNote
-                     .select(UIDNote, UID)
+                     .select(UIDNote.note, UID.title.alias('uid_title'))
                      .join(UID)
                      .where(UID.title == 'u2')
-                     .order_by(UIDNote.note))
-            self.assertEqual([(un.note, un.uid.title) for un in query],
+                     .order_by(UIDNote.note)
+                     .objects())
+            self.assertEqual([(un.note, un.uid_title) for un in query],
                              [('u2-1', 'u2'), ('u2-2', 'u2')])
 
+        # Aggregate the notes by uid in a CTE, so we group by a single column
+        # rather than by every column of UID.
+        counts = (UIDNote
+                  .select(UIDNote.uid,
+                          fn.COUNT(UIDNote.id).alias('note_count'))
+                  .group_by(UIDNote.uid)
+                  .cte('note_counts'))
+        note_count = fn.COALESCE(counts.c.note_count, 0)
         query = (UID
-                 .select(UID, fn.COUNT(UIDNote.id).alias('note_count'))
-                 .join(UIDNote, JOIN.LEFT_OUTER)
-                 .group_by(UID)
-                 .order_by(fn.COUNT(UIDNote.id).desc()))
+                 .select(UID.title, note_count.alias('note_count'))
+                 .join(counts, JOIN.LEFT_OUTER, on=(UID.id == counts.c.uid_id))
+                 .order_by(note_count.desc())
+                 .with_cte(counts))
         self.assertEqual([(u.title, u.note_count) for u in query],
                          [('u2', 2), ('u1', 1), ('u3', 0)])
 